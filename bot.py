@@ -1,7 +1,8 @@
 import logging
 import time
 from decimal import Decimal as D
-import ccxt
+from ccxt_loader import load_ccxt, load_exchange
+from profiler import StartupProfiler
 from settings import Settings
 from storage import Storage
 
@@ -12,12 +13,16 @@ class MarketMakerBot:
     После активации одной из сеток ордеров бот начинает процесс "выруливания",
     методом выставления корректирующего ордера на нужной цене
     """
-    def __init__(self, settings: 'Settings', storage: 'Storage'):
+    def __init__(self, settings: 'Settings', storage: 'Storage', profiler: 'StartupProfiler' = None):
         """
         Инициализация бота маркет-мейкера
+
+        :param profiler: Профилировщик запуска (загрузка рынков и первый тик)
         """
         self._settings = settings
         self._storage = storage
+        self._profiler = profiler if profiler is not None else StartupProfiler(False)
+        self._ccxt = load_ccxt()
 
         exchange_settings = {'apiKey': self._settings['exchange']['apiKey'],
                              'secret': self._settings['exchange']['secret'],
@@ -27,7 +32,7 @@ class MarketMakerBot:
             exchange_settings['uid'] = self._settings['exchange']['uid']
         if self._settings['exchange']['password']:
             exchange_settings['password'] = self._settings['exchange']['password']
-        exchange_class = getattr(ccxt, self._settings['exchange']['id'])
+        exchange_class = load_exchange(self._settings['exchange']['id'])
         self._exchange = exchange_class(exchange_settings)
 
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -41,7 +46,7 @@ class MarketMakerBot:
         :return: Уникальный идентификатор запроса
         """
         if self._settings['nonce_as_time']:
-            return ccxt.Exchange.milliseconds()
+            return self._ccxt.Exchange.milliseconds()
 
         current_nonce = self._storage.setdefault('nonce', 1)
         self._storage['nonce'] += 1
@@ -58,7 +63,7 @@ class MarketMakerBot:
             try:
                 self._exchange.load_markets(True)
                 return
-            except ccxt.BaseError:
+            except self._ccxt.BaseError:
                 self._logger.exception('Ошибка получения рыночной информации. Повторяю...')
 
     def _get_bid_ask(self) -> tuple:
@@ -76,7 +81,7 @@ class MarketMakerBot:
                     return None, None
                 return D(self._exchange.price_to_precision(symbol, orderbook['bids'][0][0])), \
                        D(self._exchange.price_to_precision(symbol, orderbook['asks'][0][0]))
-            except ccxt.BaseError:
+            except self._ccxt.BaseError:
                 self._logger.exception('Ошибка получения значений bid/ask. Повторяю...')
 
     def _request_balance(self) -> None:
@@ -90,7 +95,7 @@ class MarketMakerBot:
 
         try:
             balances = self._exchange.fetch_balance()
-        except ccxt.BaseError:
+        except self._ccxt.BaseError:
             self._logger.warning('Ошибка получения текущего баланса. Игнорируем...')
         else:
             balance_info = ('{0} = {1}'.format(c, v) for c, v in balances.get('total', dict()).items() if v > 0)
@@ -113,11 +118,17 @@ class MarketMakerBot:
         self._looped = True
 
         self._reload_markets()
+        self._profiler.mark('markets')
 
+        first_tick = True
         while self._looped:
             next_activity_time = time.time() + self._settings['bot_behaviour_update_period']
 
             self._behaviour()
+            if first_tick:
+                first_tick = False
+                self._profiler.mark('first tick')
+                self._profiler.report()
             self._exchange.purge_cached_orders(self._exchange.milliseconds())
             self._storage.commit()
 
@@ -158,13 +169,13 @@ class MarketMakerBot:
                     while True:
                         try:
                             sell_order = self._exchange.create_limit_sell_order(symbol, prepared_sell_amount, prepared_sell_price)
-                        except ccxt.InsufficientFunds:
+                        except self._ccxt.InsufficientFunds:
                             skip_sell = True
                             self._logger.warning('Нет средств для продажи с шага {0}'.format(i))
                             break
-                        except ccxt.NetworkError:
+                        except self._ccxt.NetworkError:
                             self._logger.exception('Сетевая ошибка создания ордера на продажу (множитель {0}, цена {1}, объем {2})'.format(i, prepared_sell_price, prepared_sell_amount))
-                        except ccxt.ExchangeError:
+                        except self._ccxt.ExchangeError:
                             self._logger.exception('Ошибка создания ордера на продажу (множитель {0}, цена {1}, объем {2})'.format(i, prepared_sell_price, prepared_sell_amount))
                             break
                         else:
@@ -180,13 +191,13 @@ class MarketMakerBot:
                     while True:
                         try:
                             buy_order = self._exchange.create_limit_buy_order(symbol, prepared_buy_amount, prepared_buy_price)
-                        except ccxt.InsufficientFunds:
+                        except self._ccxt.InsufficientFunds:
                             skip_buy = True
                             self._logger.warning('Нет средств для покупки с шага {0}'.format(-i))
                             break
-                        except ccxt.NetworkError:
+                        except self._ccxt.NetworkError:
                             self._logger.exception('Сетевая ошибка создания ордера на покупку (множитель {0}, цена {1}, объем {2})'.format(-i, prepared_buy_price, prepared_buy_amount))
-                        except ccxt.ExchangeError:
+                        except self._ccxt.ExchangeError:
                             self._logger.exception('Ошибка создания ордера на покупку (множитель {0}, цена {1}, объем {2})'.format(-i, prepared_buy_price, prepared_buy_amount))
                             break
                         else:
@@ -226,13 +237,13 @@ class MarketMakerBot:
                     while True:
                         try:
                             sell_order = self._exchange.create_limit_sell_order(symbol, prepared_sell_amount, prepared_sell_price)
-                        except ccxt.InsufficientFunds:
+                        except self._ccxt.InsufficientFunds:
                             skip_sell = True
                             self._logger.warning('Нет средств для продажи с шага {0}'.format(sell_multiplier))
                             break
-                        except ccxt.NetworkError:
+                        except self._ccxt.NetworkError:
                             self._logger.exception('Сетевая ошибка создания ордера на продажу (множитель {0}, цена {1}, объем {2})'.format(sell_multiplier, prepared_sell_price, prepared_sell_amount))
-                        except ccxt.ExchangeError:
+                        except self._ccxt.ExchangeError:
                             self._logger.exception('Ошибка создания ордера на продажу (множитель {0}, цена {1}, объем {2})'.format(sell_multiplier, prepared_sell_price, prepared_sell_amount))
                             break
                         else:
@@ -254,13 +265,13 @@ class MarketMakerBot:
                     while True:
                         try:
                             buy_order = self._exchange.create_limit_buy_order(symbol, prepared_buy_amount, prepared_buy_price)
-                        except ccxt.InsufficientFunds:
+                        except self._ccxt.InsufficientFunds:
                             skip_buy = True
                             self._logger.warning('Нет средств для покупки с шага {0}'.format(buy_multiplier))
                             break
-                        except ccxt.NetworkError:
+                        except self._ccxt.NetworkError:
                             self._logger.exception('Сетевая ошибка создания ордера на покупку (множитель {0}, цена {1}, объем {2})'.format(buy_multiplier, prepared_buy_price, prepared_buy_amount))
-                        except ccxt.BaseError:
+                        except self._ccxt.BaseError:
                             self._logger.exception('Ошибка создания ордера на покупку (множитель {0}, цена {1}, объем {2})'.format(buy_multiplier, prepared_buy_price, prepared_buy_amount))
                             break
                         else:
@@ -303,10 +314,10 @@ class MarketMakerBot:
             try:
                 opened_orders = self._exchange.fetch_open_orders(self._settings['trade_symbol'])
                 break
-            except ccxt.NetworkError:
+            except self._ccxt.NetworkError:
                 self._logger.error('Сетевая ошибка получения информации о ордерах. Жду и повторяю...')
                 time.sleep(self._settings['exchange']['timeout'] / 1000)
-            except ccxt.ExchangeError:
+            except self._ccxt.ExchangeError:
                 self._logger.exception('Биржевая ошибка получения информации о ордерах. Повторяю...')
         opened_orders_id = [order['id'] for order in opened_orders]
 
@@ -319,7 +330,7 @@ class MarketMakerBot:
                 self._logger.debug('Найден несвязанный ордер {0}. Пробую отменить...'.format(order_id))
                 try:
                     self._exchange.cancel_order(id=order_id, symbol=self._settings['trade_symbol'])
-                except ccxt.BaseError:
+                except self._ccxt.BaseError:
                     self._logger.warning('Ошибка отмены несвязанного ордера. Оставляю...')
 
         def _check_orders(orders: list) -> int:
@@ -344,9 +355,9 @@ class MarketMakerBot:
             while orders:
                 try:
                     self._exchange.cancel_order(id=orders[0]['id'], symbol=self._settings['trade_symbol'])
-                except ccxt.NetworkError:
+                except self._ccxt.NetworkError:
                     self._logger.exception('Сетевая ошибка отмены ордера. Повторяю...')
-                except ccxt.ExchangeError:
+                except self._ccxt.ExchangeError:
                     orders.pop(0)
                     self._logger.exception('Ошибка отмены ордера. Игнорирую ордер')
                 else:
@@ -0,0 +1,81 @@
+"""
+Загрузка ccxt без импорта всех бирж.
+
+ccxt/__init__.py импортирует классы всех бирж, хотя запуску нужна одна. Здесь
+пакет ccxt регистрируется в sys.modules без выполнения __init__.py, в него
+загружаются только ошибки, базовый класс Exchange и запрошенные биржи.
+Если ccxt уже импортирован целиком, используется он.
+
+Неполный пакет остается в sys.modules на весь процесс, и любой последующий
+"import ccxt" получит его же. Чтобы код, которому нужны остальные атрибуты
+(ccxt.exchanges, ccxt.TRUNCATE, ccxt.decimal_to_precision, ...), не падал с
+AttributeError, при первом обращении к отсутствующему атрибуту ccxt/__init__.py
+выполняется в том же модуле и пакет догружается целиком. Уже загруженные классы
+при этом не меняются, поэтому except ccxt.BaseError продолжает работать.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+
+
+def load_ccxt():
+    """
+    Возвращает пакет ccxt с ошибками (ccxt.BaseError, ...) и ccxt.Exchange
+
+    :return: Модуль ccxt
+    """
+    package = sys.modules.get('ccxt')
+    if package is not None:
+        return package
+
+    spec = importlib.util.find_spec('ccxt')
+    if spec is None:
+        raise ImportError('No module named ccxt')
+    package = importlib.util.module_from_spec(spec)
+    sys.modules['ccxt'] = package
+    try:
+        errors = importlib.import_module('ccxt.base.errors')
+        exchange = importlib.import_module('ccxt.base.exchange')
+    except ImportError:
+        # Несовместимая структура пакета: импортируем ccxt целиком
+        for name in [_ for _ in sys.modules if _ == 'ccxt' or _.startswith('ccxt.')]:
+            del sys.modules[name]
+        return importlib.import_module('ccxt')
+
+    for name, value in vars(errors).items():
+        if isinstance(value, type) and issubclass(value, Exception):
+            setattr(package, name, value)
+    package.Exchange = exchange.Exchange
+    package.__version__ = getattr(exchange, '__version__', None)
+
+    lock = threading.Lock()
+
+    def complete(name):
+        # Нужен атрибут полного пакета: догружаем ccxt целиком (однократно)
+        with lock:
+            if vars(package).pop('__getattr__', None) is not None:
+                spec.loader.exec_module(package)
+        return getattr(package, name)
+
+    package.__getattr__ = complete
+    return package
+
+
+def load_exchange(exchange_id: 'str') -> type:
+    """
+    Загружает класс одной биржи
+
+    :param exchange_id: Идентификатор биржи (например, binance)
+
+    :return: Класс биржи
+    """
+    package = load_ccxt()
+    # vars() вместо getattr(): отсутствующий атрибут догрузил бы весь пакет
+    exchange_class = vars(package).get(exchange_id)
+    # Атрибут может оказаться модулем ccxt.<id>, импортированным как родитель другой биржи
+    if not isinstance(exchange_class, type):
+        module = importlib.import_module('ccxt.{0}'.format(exchange_id))
+        exchange_class = getattr(module, exchange_id)
+        setattr(package, exchange_id, exchange_class)
+    return exchange_class
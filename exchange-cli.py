@@ -1,37 +1,105 @@
 """
 CLI-интерфейс для работы с биржей
+
+Может работать в режиме демона (--daemon): держит прогретое подключение к бирже
+и принимает команды через Unix-сокет. Если демон запущен, одиночные команды и пакеты
+(--batch) отправляются ему, иначе выполняются напрямую. ccxt (только нужная биржа)
+импортируется, когда требуется собственное подключение к бирже.
+
+Ограничения:
+    Nonce подписывается до отправки HTTP-запроса, поэтому параллельные запросы
+    могут прийти на биржу не в порядке возрастания nonce. По умолчанию (-w 1)
+    запросы выполняются строго последовательно, в том числе от разных клиентов
+    демона. -w N > 1 допустим только для бирж, не требующих возрастающего nonce.
+    Сокет демона не аутентифицируется: доступ ограничен правами файла (0600).
+
+Формат пакетного файла (по одной команде в строке, # - комментарий):
+    buy AMOUNT PRICE
+    sell AMOUNT PRICE
+    cancel ORDER_ID
+    list
 """
-from decimal import Decimal
-from argparse import ArgumentParser, ArgumentTypeError
-import ccxt
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from argparse import ArgumentParser, ArgumentTypeError, FileType
+from ccxt_loader import load_ccxt, load_exchange
+from profiler import StartupProfiler
 from settings import Settings
 from storage import Storage
 
 
-if __name__ == '__main__':
-    def arg_decimal(val):
+COMMANDS = {'buy': 2, 'sell': 2, 'cancel': 1, 'list': 0}
+
+# Сериализует подписанные запросы, чтобы nonce приходили на биржу по возрастанию
+REQUEST_LOCK = threading.Lock()
+
+
+def validate_command(command):
+    """
+    Проверяет команду: известное имя, число аргументов, конечные числа для buy/sell
+
+    :param command: Список [команда, аргументы...]
+
+    :return: Команда без изменений
+    """
+    if not command or command[0] not in COMMANDS or len(command) - 1 != COMMANDS[command[0]]:
+        raise ValueError('Invalid command: {0}'.format(command))
+    if command[0] in ('buy', 'sell'):
         try:
-            res = Decimal(val)
-        except Exception:
-            raise ArgumentTypeError('{0} is not a Decimal'.format(val))
-        return res
+            finite = all(Decimal(val).is_finite() for val in command[1:])
+        except InvalidOperation:
+            finite = False
+        if not finite:
+            raise ValueError('Invalid number: {0}'.format(command))
+    return command
 
-    parser = ArgumentParser()
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('-b', '--buy', type=arg_decimal, nargs=2, help='Buy AMOUNT by PRICE', metavar=('AMOUNT', 'PRICE'))
-    group.add_argument('-s', '--sell', type=arg_decimal, nargs=2, help='Sell AMOUNT by PRICE', metavar=('AMOUNT', 'PRICE'))
-    group.add_argument('-l', '--list', action='store_true', help='List balances')
-    args = parser.parse_args()
-    settings = Settings()
-    storage = Storage()
+
+def parse_command(line):
+    """
+    Разбирает строку команды пакетного файла
+
+    :param line: Строка вида "buy 1 0.01"
+
+    :return: Список [команда, аргументы...] или None для пустой строки
+    """
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    return validate_command(line.split())
+
+
+def create_exchange(settings, storage):
+    """
+    Создает объект биржи (без загрузки информации о рынках)
+
+    :param settings: Настройки
+    :param storage: Хранилище
+
+    :return: Объект биржи
+    """
+    ccxt = load_ccxt()
+
+    nonce_lock = threading.Lock()
+    last_nonce = [0]
 
     def nonce_generator():
-        if settings['nonce_as_time']:
-            return ccxt.Exchange.milliseconds()
-        current_nonce = storage.setdefault('nonce', 1)
-        storage['nonce'] += 1
-        storage.commit()
-        return current_nonce
+        with nonce_lock:
+            if settings['nonce_as_time']:
+                last_nonce[0] = max(last_nonce[0] + 1, ccxt.Exchange.milliseconds())
+                return last_nonce[0]
+            # Хранилище общее с ботом: перечитываем, чтобы не затереть его данные старой копией
+            storage.reload()
+            current_nonce = storage.setdefault('nonce', 1)
+            storage['nonce'] += 1
+            storage.commit()
+            return current_nonce
 
     exchange_settings = {'apiKey': settings['exchange']['apiKey'], 'secret': settings['exchange']['secret'],
                          'timeout': settings['exchange']['timeout'], 'nonce': nonce_generator}
@@ -39,27 +107,253 @@ if __name__ == '__main__':
         exchange_settings['uid'] = settings['exchange']['uid']
     if settings['exchange']['password']:
         exchange_settings['password'] = settings['exchange']['password']
-    exchange = getattr(ccxt, settings['exchange']['id'])(exchange_settings)
-    exchange.load_markets()
+    return load_exchange(settings['exchange']['id'])(exchange_settings)
+
+
+def execute_command(exchange, symb, command):
+    """
+    Выполняет одну команду на бирже
+
+    :param exchange: Объект биржи
+    :param symb: Торговая пара
+    :param command: Список [команда, аргументы...]
+
+    :return: Текстовый результат выполнения
+    """
+    ccxt = load_ccxt()
 
-    symb = settings['trade_symbol']
     try:
-        if args.buy:
-            amount = float(exchange.amount_to_precision(symb, args.buy[0]))
-            price = float(exchange.price_to_precision(symb, args.buy[1]))
-            order = exchange.create_limit_buy_order(symb, amount, price)
-            print('ORDER_ID:\t{0}'.format(order['id']))
-        elif args.sell:
-            amount = float(exchange.amount_to_precision(symb, args.sell[0]))
-            price = float(exchange.price_to_precision(symb, args.sell[1]))
-            order = exchange.create_limit_sell_order(symb, amount, price)
-            print('ORDER_ID:\t{0}'.format(order['id']))
-        elif args.list:
+        if command[0] in ('buy', 'sell'):
+            amount = float(exchange.amount_to_precision(symb, Decimal(command[1])))
+            price = float(exchange.price_to_precision(symb, Decimal(command[2])))
+            if command[0] == 'buy':
+                order = exchange.create_limit_buy_order(symb, amount, price)
+            else:
+                order = exchange.create_limit_sell_order(symb, amount, price)
+            return 'ORDER_ID:\t{0}'.format(order['id'])
+        elif command[0] == 'cancel':
+            exchange.cancel_order(id=command[1], symbol=symb)
+            return 'CANCELED:\t{0}'.format(command[1])
+        elif command[0] == 'list':
             balances = exchange.fetch_balance()
-            print('\n'.join('{0}:\t{1}'.format(name, amount) for name, amount in balances.get('total', {}).items() if amount > 0))
+            return '\n'.join('{0}:\t{1}'.format(name, amount) for name, amount in balances.get('total', {}).items() if amount > 0)
     except ccxt.InsufficientFunds as e:
-        print('Not enought money: ', e)
+        return 'Not enought money: {0}'.format(e)
     except ccxt.BaseError as e:
-        print('ExchangeError: ', e)
+        return 'ExchangeError: {0}'.format(e)
     except Exception as e:
-        print('Exception: ', e)
+        return 'Exception: {0}'.format(e)
+
+
+def execute_batch(exchange, symb, commands, workers):
+    """
+    Выполняет пакет команд. При workers = 1 команды выполняются последовательно
+    под REQUEST_LOCK, иначе параллельно (порядок nonce не гарантируется)
+
+    :param exchange: Объект биржи
+    :param symb: Торговая пара
+    :param commands: Список команд
+    :param workers: Количество параллельных запросов
+
+    :return: Список результатов в порядке команд
+    """
+    if workers <= 1:
+        results = []
+        for command in commands:
+            with REQUEST_LOCK:
+                results.append(execute_command(exchange, symb, command))
+        return results
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda command: execute_command(exchange, symb, command), commands))
+
+
+def run_daemon(socket_path, exchange, symb, workers):
+    """
+    Запускает демон, принимающий пакеты команд через Unix-сокет.
+    Запрос и ответ - одна строка JSON:
+    {"commands": [...], "workers": N} -> {"results": [...], "workers": N}
+
+    :param socket_path: Путь к сокету (существующим может быть только сокет)
+    :param exchange: Объект биржи
+    :param symb: Торговая пара
+    :param workers: Максимальное количество параллельных запросов на пакет
+
+    :return: None
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline().decode('utf8'))
+                commands = request.get('commands') if isinstance(request, dict) else None
+                if not isinstance(commands, list) or not all(
+                        isinstance(command, list) and all(isinstance(arg, str) for arg in command)
+                        for command in commands):
+                    raise ValueError('commands must be a list of lists of strings')
+                commands = [validate_command(command) for command in commands]
+                requested = request.get('workers', 1)
+                if not isinstance(requested, int) or isinstance(requested, bool) or requested < 1:
+                    raise ValueError('workers must be a positive integer')
+                batch_workers = min(requested, workers)
+                response = {'results': execute_batch(exchange, symb, commands, batch_workers),
+                            'workers': batch_workers}
+            except ValueError as e:
+                response = {'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf8'))
+
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise FileExistsError('{0} exists and is not a socket'.format(socket_path))
+        os.unlink(socket_path)
+    # Сокет принимает ордера без аутентификации - доступ только владельцу
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    finally:
+        os.umask(umask)
+    print('Listening on {0}'.format(socket_path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def send_to_daemon(socket_path, commands, workers, timeout):
+    """
+    Отправляет пакет команд демону
+
+    :param socket_path: Путь к сокету
+    :param commands: Список команд
+    :param workers: Запрошенное количество параллельных запросов
+    :param timeout: Время ожидания ответа демона в секундах
+
+    :raises ConnectionError: Связь с демоном потеряна после отправки команд
+    :raises ValueError: Демон отклонил запрос
+
+    :return: (Список результатов, использованное демоном количество параллельных запросов)
+             или None, если демон не запущен
+    """
+    if not os.path.exists(socket_path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return None
+        try:
+            sock.sendall((json.dumps({'commands': commands, 'workers': workers}) + '\n').encode('utf8'))
+            with sock.makefile('rb') as f:
+                line = f.readline()
+            if not line:
+                raise ConnectionError('daemon closed connection')
+            response = json.loads(line.decode('utf8'))
+        except (OSError, ValueError) as e:
+            raise ConnectionError(str(e))
+    if 'error' in response:
+        raise ValueError(response['error'])
+    return response['results'], response.get('workers', 1)
+
+
+if __name__ == '__main__':
+    def arg_decimal(val):
+        try:
+            res = Decimal(val)
+        except Exception:
+            raise ArgumentTypeError('{0} is not a Decimal'.format(val))
+        if not res.is_finite():
+            raise ArgumentTypeError('{0} is not a finite Decimal'.format(val))
+        return res
+
+    parser = ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-b', '--buy', type=arg_decimal, nargs=2, help='Buy AMOUNT by PRICE', metavar=('AMOUNT', 'PRICE'))
+    group.add_argument('-s', '--sell', type=arg_decimal, nargs=2, help='Sell AMOUNT by PRICE', metavar=('AMOUNT', 'PRICE'))
+    group.add_argument('-c', '--cancel', help='Cancel order ORDER_ID', metavar='ORDER_ID')
+    group.add_argument('-l', '--list', action='store_true', help='List balances')
+    group.add_argument('-f', '--batch', type=FileType('r', encoding='utf8'), help='Execute commands from FILE (- for stdin)', metavar='FILE')
+    group.add_argument('-d', '--daemon', action='store_true', help='Run daemon with warm exchange session')
+    parser.add_argument('--socket', default='exchange-cli.sock', help='Daemon socket path')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Concurrent requests for batch (with --daemon: maximum allowed to clients). '
+                             'Default 1 runs requests one by one so nonces reach the exchange in order; '
+                             'values > 1 may deliver nonces out of order, use only with exchanges '
+                             'that do not require increasing nonces')
+    parser.add_argument('-t', '--timeout', type=float, default=300, help='Daemon response timeout, seconds')
+    parser.add_argument('--profile-startup', action='store_true', help='Report import, market-load and first-command time')
+    args = parser.parse_args()
+    profiler = StartupProfiler(args.profile_startup)
+    if args.workers < 1:
+        parser.error('argument -w/--workers: must be positive')
+    if os.path.exists(args.socket) and not stat.S_ISSOCK(os.stat(args.socket).st_mode):
+        parser.error('argument --socket: {0} exists and is not a socket'.format(args.socket))
+
+    if args.buy:
+        commands = [['buy', str(args.buy[0]), str(args.buy[1])]]
+    elif args.sell:
+        commands = [['sell', str(args.sell[0]), str(args.sell[1])]]
+    elif args.cancel:
+        commands = [['cancel', args.cancel]]
+    elif args.list:
+        commands = [['list']]
+    elif args.batch:
+        with args.batch:
+            try:
+                commands = [c for c in (parse_command(line) for line in args.batch) if c is not None]
+            except ValueError as e:
+                parser.error(str(e))
+        if not commands:
+            parser.error('no commands in {0}'.format(args.batch.name))
+    else:
+        commands = None
+
+    # Если демон не запущен, команды выполняются напрямую
+    try:
+        response = send_to_daemon(args.socket, commands or [], args.workers, args.timeout)
+    except ConnectionError as e:
+        sys.exit('Daemon connection lost ({0}), check open orders'.format(e))
+    except ValueError as e:
+        sys.exit('Daemon rejected request: {0}'.format(e))
+    except OSError as e:
+        sys.exit('Daemon is unavailable: {0}'.format(e))
+    if args.daemon and response is not None:
+        parser.error('daemon already listening on {0}'.format(args.socket))
+    results = None
+    if response is not None:
+        results, workers = response
+        if workers < args.workers:
+            print('Daemon limits batch to {0} concurrent requests (start it with -w {1})'.format(
+                workers, args.workers), file=sys.stderr)
+
+    if results is None:
+        profiler.mark('daemon probe')
+        settings = Settings()
+        storage = Storage()
+        profiler.mark('settings')
+        ccxt = load_ccxt()
+        load_exchange(settings['exchange']['id'])
+        profiler.mark('import')
+        exchange = create_exchange(settings, storage)
+        profiler.mark('exchange')
+        try:
+            exchange.load_markets()
+        except ccxt.BaseError as e:
+            profiler.report()
+            print('ExchangeError: ', e)
+            sys.exit(1)
+        profiler.mark('markets')
+        if args.daemon:
+            profiler.report()
+            run_daemon(args.socket, exchange, settings['trade_symbol'], args.workers)
+            sys.exit(0)
+        results = execute_batch(exchange, settings['trade_symbol'], commands, args.workers)
+    profiler.mark('first command')
+    profiler.report()
+
+    if len(commands) == 1:
+        print(results[0])
+    else:
+        for command, result in zip(commands, results):
+            print('{0}\t{1}'.format(' '.join(command), result))
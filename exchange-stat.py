@@ -3,15 +3,26 @@ from datetime import datetime
 from functools import partial
 from decimal import Decimal as D
 from os import path
+from argparse import ArgumentParser
 import csv
-import ccxt
+from ccxt_loader import load_ccxt, load_exchange
+from profiler import StartupProfiler
 from settings import Settings
 from storage import Storage
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--profile-startup', action='store_true', help='Report import, market-load and first-tick time')
+    args = parser.parse_args()
+    profiler = StartupProfiler(args.profile_startup)
     settings = Settings('settings-stat.json')
     storage = Storage('storage-stat.db')
+    profiler.mark('settings')
+    ccxt = load_ccxt()
+    for account in settings['accounts']:
+        load_exchange(account['id'])
+    profiler.mark('import')
 
     def nonce(name, use_time):
         if use_time:
@@ -29,12 +40,16 @@ if __name__ == '__main__':
             ex_setting['uid'] = account['uid']
         if account['password']:
             ex_setting['password'] = account['password']
-        exchanges.append({'exchange': getattr(ccxt, account['id'])(ex_setting),
+        exchanges.append({'exchange': load_exchange(account['id'])(ex_setting),
                           'file': account['file'],
                           'base': account['base'],
                           'quote': account['quote']})
-        exchanges[-1]['exchange'].load_markets()
+    profiler.mark('exchange')
+    for account in exchanges:
+        account['exchange'].load_markets()
+    profiler.mark('markets')
 
+    first_tick = True
     while True:
         next_time = time() + settings['period']
         row_time = datetime.utcnow().strftime('%d.%m.%y %H:%M')
@@ -72,6 +87,10 @@ if __name__ == '__main__':
                     writer.writerow(row)
             except (ccxt.BaseError, OSError, csv.Error) as e:
                 print(e)
+        if first_tick:
+            first_tick = False
+            profiler.mark('first tick')
+            profiler.report()
 
         wait_time = next_time - time()
         if wait_time > 0:
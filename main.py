@@ -1,18 +1,29 @@
 from argparse import ArgumentParser
 import logging.config
+from profiler import StartupProfiler
 from settings import Settings
 from storage import Storage
-from bot import MarketMakerBot
 
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('-r', '--reset', help='reset all bot orders', action='store_true')
+    parser.add_argument('--profile-startup', help='report import, market-load and first-tick time',
+                        action='store_true')
     args = parser.parse_args()
+    profiler = StartupProfiler(args.profile_startup)
     settings = Settings()
     storage = Storage()
     logging.config.dictConfig(settings['logging'])
-    mm_bot = MarketMakerBot(settings, storage)
+    profiler.mark('settings')
+    # ccxt импортируется только после разбора аргументов и настроек, и только нужная биржа
+    from bot import MarketMakerBot
+    from ccxt_loader import load_exchange
+    load_exchange(settings['exchange']['id'])
+    profiler.mark('import')
+    mm_bot = MarketMakerBot(settings, storage, profiler)
+    profiler.mark('exchange')
     if args.reset:
         mm_bot.reset()
+        profiler.mark('reset')
     mm_bot.loop()
     storage.commit()
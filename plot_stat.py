@@ -1,11 +1,18 @@
 from os import walk, path
-from pandas import read_csv, datetime, date_range
-from matplotlib import pyplot as plt
+from argparse import ArgumentParser
+from profiler import StartupProfiler
+
+def plot_modules():
+	# pandas и matplotlib импортируются только при наличии данных для графика
+	from pandas import read_csv, to_datetime
+	from matplotlib import pyplot as plt
+	return read_csv, to_datetime, plt
 
 def make_plot(source, destination):
-	dateparse = lambda x: datetime.strptime(x, '%d.%m.%y %H:%M')
-	data = read_csv(source, index_col=0, usecols=['Time', 'Total(BTC)'], parse_dates=True, date_parser=dateparse, encoding='utf8')
-	data = data.resample('H').last()
+	read_csv, to_datetime, plt = plot_modules()
+	data = read_csv(source, index_col=0, usecols=['Time', 'Total(BTC)'], encoding='utf8')
+	data.index = to_datetime(data.index, format='%d.%m.%y %H:%M')
+	data = data.resample('60min').last()
 	ylim = [data['Total(BTC)'].min(), data['Total(BTC)'].max()]
 	ax = data.plot(y='Total(BTC)', kind='area', title='Equity (BTC)', legend=False, ylim=ylim, colormap='Accent')
 	ax.xaxis.set_label_text('')
@@ -15,9 +22,22 @@ def make_plot(source, destination):
 	plt.savefig(destination)
 
 if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--profile-startup', action='store_true', help='Report import and first-plot time')
+	args = parser.parse_args()
+	profiler = StartupProfiler(args.profile_startup)
+	sources = []
 	for dirpath, dirnames, filenames in walk(path.dirname(path.realpath(__file__))):
 		for filename in filenames:
 			filename = path.join(dirpath, filename)
 			name, ext = path.splitext(filename)
 			if ext == '.csv':
-				make_plot(filename, name + '.jpg')
+				sources.append((filename, name + '.jpg'))
+	if sources:
+		plot_modules()
+		profiler.mark('import')
+		make_plot(*sources[0])
+		profiler.mark('first plot')
+		profiler.report()
+		for source, destination in sources[1:]:
+			make_plot(source, destination)
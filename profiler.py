@@ -0,0 +1,49 @@
+import sys
+import time
+
+
+class StartupProfiler:
+    """
+    Замер времени этапов запуска (импорт, загрузка рынков, первый тик).
+    Отключенный профилировщик ничего не замеряет и не выводит
+    """
+    def __init__(self, enabled: 'bool' = True):
+        """
+        Выполняет инициализацию профилировщика. Отсчет начинается с момента создания
+
+        :param enabled: Включен ли замер
+        """
+        self.__enabled = enabled
+        self.__stages = []
+        self.__reported = False
+        self.__started = self.__last = time.perf_counter()
+
+    def mark(self, stage: 'str') -> None:
+        """
+        Завершает этап: запоминает время, прошедшее с предыдущей отметки.
+        Повторные отметки этапа и отметки после отчета игнорируются
+
+        :param stage: Название этапа
+
+        :return: None
+        """
+        if not self.__enabled or self.__reported or stage in (name for name, _ in self.__stages):
+            return
+        now = time.perf_counter()
+        self.__stages.append((stage, now - self.__last))
+        self.__last = now
+
+    def report(self) -> None:
+        """
+        Выводит отчет о времени этапов в stderr (однократно)
+
+        :return: None
+        """
+        if not self.__enabled or self.__reported:
+            return
+        self.__reported = True
+        width = max([len(name) for name, _ in self.__stages] + [len('total')])
+        lines = ['Startup profile:']
+        lines.extend('  {0:<{1}}  {2:8.3f} s'.format(name, width, elapsed) for name, elapsed in self.__stages)
+        lines.append('  {0:<{1}}  {2:8.3f} s'.format('total', width, self.__last - self.__started))
+        print('\n'.join(lines), file=sys.stderr)
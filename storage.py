@@ -9,6 +9,14 @@ class Storage(collections.abc.MutableMapping):
         :param file_name: Имя файла-хранилища
         """
         self.__file_name = file_name
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Выполняет повторную загрузку хранилища с диска (например, после изменения другим процессом)
+
+        :return: None
+        """
         try:
             with open(self.__file_name, 'rb') as storage_file:
                 self.__storage = pickle.load(storage_file)